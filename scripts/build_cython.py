@@ -0,0 +1,31 @@
+"""Build the optional Cython kernels (src/warehouse_logic_cy.pyx) in place.
+Needs the `fast` extra (pip install -e '.[fast]' or uv sync --extra fast):
+
+    python scripts/build_cython.py
+"""
+import os
+
+from Cython.Build import cythonize
+from setuptools import Extension
+from setuptools.dist import Distribution
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    os.chdir(ROOT)
+    extensions = cythonize(
+        [Extension('src.warehouse_logic_cy', ['src/warehouse_logic_cy.pyx'],
+                   extra_compile_args=['-O3', '-march=native'])],
+        compiler_directives={'boundscheck': False, 'wraparound': False},
+    )
+    # A bare Distribution builds just this extension without reading the
+    # project's pyproject.toml packaging config
+    dist = Distribution({'name': 'warehouse_logic_cy', 'ext_modules': extensions})
+    build_ext = dist.get_command_obj('build_ext')
+    build_ext.inplace = True
+    dist.run_command('build_ext')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Compile the 3x3 warehouse knowledge base into a percept->summary lookup table.
+Enumerates every percept set a robot can collect along a trajectory from (1,1)
+(each visited cell observed for both C and N) and stores the summary masks,
+keyed by encode_percepts, in a pickle for summarize_from_percepts.
+The output, scripts/output/warehouse_kb.pkl, is committed; the test suite
+fails if it no longer matches a fresh compile.
+"""
+import os
+import pickle
+import sys
+
+# Add workspace root to path so we can import src module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.warehouse_logic import (ALL_MASK, BIT_11, MODELS_TABLE, NEIGHBOR_BITS, coords,
+                                 enumerate_models, summary_masks)
+
+OUT_DIR = 'scripts/output'
+KB_PATH = os.path.join(OUT_DIR, 'warehouse_kb.pkl')
+
+
+def visited_sets():
+    """Return every connected set of cells (as a mask) that contains (1,1)."""
+    seen = {BIT_11}
+    frontier = [BIT_11]
+    while frontier:
+        mask = frontier.pop()
+        border = 0
+        for i in range(len(coords)):
+            if mask >> i & 1:
+                border |= NEIGHBOR_BITS[i]
+        border &= ~mask
+        while border:
+            lsb = border & -border
+            grown = mask | lsb
+            if grown not in seen:
+                seen.add(grown)
+                frontier.append(grown)
+            border ^= lsb
+    return seen
+
+
+def percept_keys():
+    """Return the encoded percepts observable in some world along some trajectory.
+    The robot only ever stands on cells that are safe in the true world.
+    """
+    keys = {(0, 0, 0, 0)}
+    for visited in visited_sets():
+        for D, F, C, N in MODELS_TABLE:
+            if visited & (D | F):
+                continue
+            keys.add((C & visited, visited & ~C & ALL_MASK,
+                      N & visited, visited & ~N & ALL_MASK))
+    return keys
+
+
+def decode_key(key):
+    """Turn encoded percept masks back into a percepts dict."""
+    c_req, c_forbid, n_req, n_forbid = key
+    percepts = {}
+    for i, cell in enumerate(coords):
+        bit = 1 << i
+        for sym, req, forbid in (('C', c_req, c_forbid), ('N', n_req, n_forbid)):
+            if (req | forbid) & bit:
+                percepts[(sym, cell)] = bool(req & bit)
+    return percepts
+
+
+def compile_kb():
+    # Plain tuples keep the pickle independent of the SummaryMasks class
+    return {key: tuple(summary_masks(enumerate_models(decode_key(key))))
+            for key in percept_keys()}
+
+
+def main():
+    os.makedirs(OUT_DIR, exist_ok=True)
+    kb = compile_kb()
+    with open(KB_PATH, 'wb') as f:
+        pickle.dump(kb, f, protocol=pickle.HIGHEST_PROTOCOL)
+    print(f'Compiled {len(kb)} percept sets to', KB_PATH)
+
+
+if __name__ == '__main__':
+    main()
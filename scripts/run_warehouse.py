@@ -7,77 +7,97 @@ import sys
 # Add workspace root to path so we can import src module
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.warehouse_logic import enumerate_models, summarize, coords
+import numpy as np
+
+from src.warehouse_logic import IDX, coords, percept_summary_masks, summary_from_masks
+
+try:
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib.collections import LineCollection, PatchCollection
+    from matplotlib.figure import Figure
+    from matplotlib.patches import Rectangle
+    _MPL = True
+except ImportError:
+    _MPL = False
 
 OUT_DIR = 'scripts/output'
 os.makedirs(OUT_DIR, exist_ok=True)
 
+GRID_SEGMENTS = [((x, 0), (x, 3)) for x in range(4)] + [((0, y), (3, y)) for y in range(4)]
+_scaffold = None
+
+# Per-status display, indexed by cell_status(): SAFE, P:D+F, P:D, P:F, ???
+STATUS_COLORS = np.array(['#c6f6d5', '#f9d6d6', '#fff3b0', '#bcdff9', '#e6e6e6'])
+STATUS_LABELS = np.array(['SAFE', 'P:D+F', 'P:D', 'P:F', '???'])
+CELL_SHIFTS = np.arange(len(coords))
+
+# Cells in ASCII reading order (row y=3 first) and the matching 3x3 template
+ASCII_ORDER = [(x, y) for y in (3, 2, 1) for x in (1, 2, 3)]
+ASCII_INDEX = np.array([IDX[c] for c in ASCII_ORDER])
+ASCII_TEMPLATE = '\n'.join([' | '.join(['{:5}'] * 3)] * 3)
+
+# Listing order for printed cell sets (same order sorted() would give)
+PRINT_ORDER = sorted(coords)
+
+
+def ordered(cells):
+    return [c for c in PRINT_ORDER if c in cells]
+
 
 def coords_to_label(cell):
     return f"({cell[0]},{cell[1]})"
 
 
-def ascii_grid_label(prov_safe, possible_D, possible_F):
+def cell_status(prov_safe, possible_D, possible_F):
+    """Return the STATUS_* index of every cell, in coords order.
+    Arguments are the provably-safe / possible-D / possible-F summary masks.
+    """
+    safe = ((prov_safe >> CELL_SHIFTS) & 1).astype(bool)
+    pd = ((possible_D >> CELL_SHIFTS) & 1).astype(bool)
+    pf = ((possible_F >> CELL_SHIFTS) & 1).astype(bool)
+    return np.where(safe, 0, np.where(pd & pf, 1, np.where(pd, 2, np.where(pf, 3, 4))))
+
+
+def ascii_grid_label(status):
     # Return a simple multiline string representing the grid (j=3 down to 1)
-    rows = []
-    for y in (3, 2, 1):
-        cells = []
-        for x in (1, 2, 3):
-            c = (x, y)
-            if c in prov_safe:
-                cells.append('SAFE')
-            elif c in possible_D and c in possible_F:
-                cells.append('P:D+F')
-            elif c in possible_D:
-                cells.append('P:D')
-            elif c in possible_F:
-                cells.append('P:F')
-            else:
-                cells.append('???')
-        rows.append(' | '.join(f"{cell:5}" for cell in cells))
-    return '\n'.join(rows)
-
-
-def try_draw_png(filename, prov_safe, possible_D, possible_F):
-    try:
-        import matplotlib.pyplot as plt
-        fig, ax = plt.subplots(figsize=(3, 3))
+    return ASCII_TEMPLATE.format(*STATUS_LABELS[status[ASCII_INDEX]])
+
+
+def _grid_scaffold():
+    # Figure, grid lines, cell patches and label texts are the same for every
+    # diagram; build them once and only restyle them per call
+    global _scaffold
+    if _scaffold is None:
+        # Build the Figure directly: savefig renders through Agg without pyplot
+        # ever resolving or starting an interactive backend
+        fig = Figure(figsize=(3, 3))
+        ax = fig.add_subplot()
         ax.set_xlim(0, 3)
         ax.set_ylim(0, 3)
         ax.set_xticks([])
         ax.set_yticks([])
-        for x in (0, 1, 2, 3):
-            ax.plot([x, x], [0, 3], color='k', lw=1)
-        for y in (0, 1, 2, 3):
-            ax.plot([0, 3], [y, y], color='k', lw=1)
-
-        for (cx, cy) in coords:
-            rx = cx - 1
-            ry = cy - 1
-            cell = (cx, cy)
-            if cell in prov_safe:
-                color = '#c6f6d5'
-                label = 'SAFE'
-            elif cell in possible_D and cell in possible_F:
-                color = '#f9d6d6'
-                label = 'P:D+F'
-            elif cell in possible_D:
-                color = '#fff3b0'
-                label = 'P:D'
-            elif cell in possible_F:
-                color = '#bcdff9'
-                label = 'P:F'
-            else:
-                color = '#e6e6e6'
-                label = '???'
-            rect = plt.Rectangle((rx, ry), 1, 1, facecolor=color, edgecolor='k')
-            ax.add_patch(rect)
-            ax.text(rx + 0.5, ry + 0.5, label, ha='center', va='center', fontsize=8)
-
+        ax.add_collection(LineCollection(GRID_SEGMENTS, colors='k', linewidths=1))
+        cells = PatchCollection([Rectangle((cx - 1, cy - 1), 1, 1) for (cx, cy) in coords],
+                                edgecolors='k')
+        ax.add_collection(cells)
+        labels = [ax.text(cx - 0.5, cy - 0.5, '', ha='center', va='center', fontsize=8)
+                  for (cx, cy) in coords]
         ax.invert_yaxis()
-        plt.tight_layout()
+        fig.tight_layout()
+        _scaffold = (fig, cells, labels)
+    return _scaffold
+
+
+def try_draw_png(filename, status):
+    if not _MPL:
+        return False
+    try:
+        fig, cells, labels = _grid_scaffold()
+        cells.set_facecolor(STATUS_COLORS[status])
+        for text, label in zip(labels, STATUS_LABELS[status]):
+            text.set_text(label)
         fig.savefig(filename, dpi=150)
-        plt.close(fig)
         return True
     except Exception:
         return False
@@ -86,42 +106,41 @@ def try_draw_png(filename, prov_safe, possible_D, possible_F):
 def run():
     # Scenario 1: robot at (1,1) perceives no creaking and no noise
     percepts1 = {('C', (1, 1)): False, ('N', (1, 1)): False}
-    models1 = enumerate_models(percepts1)
-    summary1 = summarize(models1)
+    # Scenario 2: robot moves to (2,1) and perceives creaking and no noise
+    percepts2 = {('C', (1, 1)): False, ('N', (1, 1)): False, ('C', (2, 1)): True, ('N', (2, 1)): False}
+    masks1, masks2 = [percept_summary_masks(p) for p in (percepts1, percepts2)]
+    summary1, summary2 = summary_from_masks(*masks1), summary_from_masks(*masks2)
+    status1, status2 = [cell_status(m.provably_safe, m.possible_D, m.possible_F)
+                        for m in (masks1, masks2)]
 
     # Print summary 1
     print('--- Scenario 1: at (1,1), ¬C, ¬N ---')
     print('Models consistent:', summary1['num_models'])
-    print('Provably safe:', sorted(summary1['provably_safe']))
-    print('Possible damaged-floor locations:', sorted(summary1['possible_D']))
-    print('Possible forklift locations:', sorted(summary1['possible_F']))
+    print('Provably safe:', ordered(summary1['provably_safe']))
+    print('Possible damaged-floor locations:', ordered(summary1['possible_D']))
+    print('Possible forklift locations:', ordered(summary1['possible_F']))
     print('\nGrid (ASCII):')
-    ascii1 = ascii_grid_label(summary1['provably_safe'], summary1['possible_D'], summary1['possible_F'])
+    ascii1 = ascii_grid_label(status1)
     print(ascii1)
 
     png1 = os.path.join(OUT_DIR, 'scenario1.png')
-    ok1 = try_draw_png(png1, summary1['provably_safe'], summary1['possible_D'], summary1['possible_F'])
+    ok1 = try_draw_png(png1, status1)
     if ok1:
         print('Saved diagram to', png1)
     else:
         print('matplotlib not available, skipped PNG for scenario1')
 
-    # Scenario 2: robot moves to (2,1) and perceives creaking and no noise
-    percepts2 = {('C', (1, 1)): False, ('N', (1, 1)): False, ('C', (2, 1)): True, ('N', (2, 1)): False}
-    models2 = enumerate_models(percepts2)
-    summary2 = summarize(models2)
-
     print('\n--- Scenario 2: moved to (2,1), C, ¬N ---')
     print('Models consistent:', summary2['num_models'])
-    print('Provably safe:', sorted(summary2['provably_safe']))
-    print('Possible damaged-floor locations:', sorted(summary2['possible_D']))
-    print('Possible forklift locations:', sorted(summary2['possible_F']))
+    print('Provably safe:', ordered(summary2['provably_safe']))
+    print('Possible damaged-floor locations:', ordered(summary2['possible_D']))
+    print('Possible forklift locations:', ordered(summary2['possible_F']))
     print('\nGrid (ASCII):')
-    ascii2 = ascii_grid_label(summary2['provably_safe'], summary2['possible_D'], summary2['possible_F'])
+    ascii2 = ascii_grid_label(status2)
     print(ascii2)
 
     png2 = os.path.join(OUT_DIR, 'scenario2.png')
-    ok2 = try_draw_png(png2, summary2['provably_safe'], summary2['possible_D'], summary2['possible_F'])
+    ok2 = try_draw_png(png2, status2)
     if ok2:
         print('Saved diagram to', png2)
     else:
@@ -1,13 +1,31 @@
 """Warehouse propositional enumerator for 3x3 grid.
 Provides functions to enumerate all models consistent with axioms+percepts
 and to compute provable facts (safe/damaged/forklift) across all models.
+
+Cell sets are represented internally as 9-bit int masks (bit i = y*3+x for
+0-based x, y, i.e. the index of the cell in ``coords``) and are only turned
+back into sets of (x, y) tuples by ``summarize``.
 """
-from itertools import product
+import os
+import pickle
+from functools import lru_cache, reduce
+from multiprocessing import Pool
+from operator import or_
+from typing import NamedTuple
+
+import numpy as np
+
+try:
+    from . import warehouse_logic_cy as _cy
+except ImportError:  # compiled kernels are optional; see scripts/build_cython.py
+    _cy = None
 
 coords = [(x, y) for y in (1, 2, 3) for x in (1, 2, 3)]
+IDX = {cell: i for i, cell in enumerate(coords)}
+ALL_MASK = (1 << len(coords)) - 1
 
 
-def neighbors(cell):
+def _neighbors(cell):
     x, y = cell
     neigh = []
     for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
@@ -17,30 +35,180 @@ def neighbors(cell):
     return neigh
 
 
-def derive_creaks(Dset):
-    """Return set of cells where creaking (C) is true given damaged set Dset."""
-    Cset = set()
-    for cell in coords:
-        for n in neighbors(cell):
-            if n in Dset:
-                Cset.add(cell)
-                break
-    return Cset
+# Adjacency is fixed for the grid, so compute it once at import
+NEIGHBORS = {cell: tuple(_neighbors(cell)) for cell in coords}
+NEIGHBORS_IDX = [tuple(IDX[n] for n in NEIGHBORS[cell]) for cell in coords]
+NEIGHBOR_BITS = [reduce(or_, (1 << j for j in nbrs), 0) for nbrs in NEIGHBORS_IDX]
+
+
+def neighbors(cell):
+    return NEIGHBORS[cell]
+
+
+def cells_to_mask(cells):
+    """Return the bitmask with a bit set for every cell in cells."""
+    mask = 0
+    for cell in cells:
+        mask |= 1 << IDX[cell]
+    return mask
+
+
+# Read-only cell sets for every possible mask, shared instead of rebuilt per call
+CELLS_OF_MASK = [
+    frozenset(cell for i, cell in enumerate(coords) if mask >> i & 1)
+    for mask in range(ALL_MASK + 1)
+]
+
+
+def mask_to_cells(mask):
+    """Return the frozenset of cells whose bit is set in mask."""
+    return CELLS_OF_MASK[mask]
+
+
+def _neighbor_union(mask):
+    """OR together the neighbor masks of every cell set in mask."""
+    if not 0 <= mask <= ALL_MASK:
+        raise ValueError('Cell mask out of range')
+    result = 0
+    while mask:
+        lsb = mask & -mask
+        result |= NEIGHBOR_BITS[lsb.bit_length() - 1]
+        mask ^= lsb
+    return result
+
+
+def derive_creaks(Dmask):
+    """Return mask of cells where creaking (C) is true given damaged mask Dmask."""
+    return _neighbor_union(Dmask)
+
+
+def derive_noises(Fmask):
+    """Return mask of cells where noise (N) is true given forklift mask Fmask."""
+    return _neighbor_union(Fmask)
+
+
+def is_safe(i, Dmask, Fmask):
+    return not ((Dmask | Fmask) >> i) & 1
+
+
+class Model(NamedTuple):
+    """One model: masks of damaged (D), forklift (F), creaking (C) and noise (N) cells."""
+    D: int
+    F: int
+    C: int
+    N: int
+
+
+START = IDX[(1, 1)]
+BIT_11 = 1 << START
+
+# Every (D, F, C, N) assignment allowed by the axioms: exactly one D, exactly
+# one F, and the start square (1,1) is safe => not D and not F.
+# With a single damaged cell d, derive_creaks(1 << d) is just NEIGHBOR_BITS[d]
+# (likewise for noises), so the table reads the neighbor masks directly.
+MODELS_TABLE = [
+    Model(1 << d, 1 << f, NEIGHBOR_BITS[d], NEIGHBOR_BITS[f])
+    for d in range(len(coords)) if d != START
+    for f in range(len(coords)) if f != START
+]
+
+# Column view of MODELS_TABLE so percept checks run over all models at once
+D_ARR, F_ARR, C_ARR, N_ARR = np.array(MODELS_TABLE, dtype=np.uint16).T.copy()
+# C and N packed into one word per model (C in the high half) so a single
+# AND/compare checks both percept kinds
+CN_ARR = (C_ARR.astype(np.uint32) << 16) | N_ARR
+
+
+def _pack_percepts(c_req, c_forbid, n_req, n_forbid):
+    """Pack percept masks the same way as CN_ARR: returns (req, forbid)."""
+    return (c_req << 16) | n_req, (c_forbid << 16) | n_forbid
+
+
+def _filter_rows_numpy(c_req, c_forbid, n_req, n_forbid):
+    """Return indices of MODELS_TABLE rows consistent with the percept masks."""
+    req, forbid = _pack_percepts(c_req, c_forbid, n_req, n_forbid)
+    return np.flatnonzero(((CN_ARR & req) == req) & ((CN_ARR & forbid) == 0))
+
+
+def _filter_kernel(CN, req, forbid, out):
+    # Loop form of _filter_rows_numpy, compiled by _make_jit_filter
+    k = 0
+    for i in range(CN.size):
+        cn = CN[i]
+        if (cn & req) == req and (cn & forbid) == 0:
+            out[k] = i
+            k += 1
+    return k
+
+
+def _make_jit_filter():
+    """Return a Numba-compiled _filter_rows, or None when numba is not installed."""
+    try:
+        from numba import njit
+    except ImportError:
+        return None
+    kernel = njit(cache=True)(_filter_kernel)
 
+    def _filter_rows_jit(c_req, c_forbid, n_req, n_forbid):
+        """Return indices of MODELS_TABLE rows consistent with the percept masks."""
+        req, forbid = _pack_percepts(c_req, c_forbid, n_req, n_forbid)
+        out = np.empty(CN_ARR.size, dtype=np.intp)
+        return out[:kernel(CN_ARR, req, forbid, out)]
 
-def derive_noises(Fset):
-    """Return set of cells where noise (N) is true given forklift set Fset."""
-    Nset = set()
-    for cell in coords:
-        for n in neighbors(cell):
-            if n in Fset:
-                Nset.add(cell)
-                break
-    return Nset
+    return _filter_rows_jit
 
 
-def is_safe(cell, Dset, Fset):
-    return (cell not in Dset) and (cell not in Fset)
+if _cy is not None:
+    def _filter_rows(c_req, c_forbid, n_req, n_forbid):
+        """Return indices of MODELS_TABLE rows consistent with the percept masks."""
+        return _cy.filter_rows(CN_ARR, *_pack_percepts(c_req, c_forbid, n_req, n_forbid))
+else:
+    _filter_rows = _filter_rows_numpy
+
+
+def enable_jit():
+    """Route percept filtering through a Numba kernel, for long percept sweeps.
+    The numba import and compilation happen here rather than at import time, so
+    plain imports and the runner never pay for them. Does nothing when the
+    Cython kernels are built. Returns True if the Numba kernel is now in use.
+    """
+    global _filter_rows
+    if _cy is not None:
+        return False
+    jit_filter = _make_jit_filter()
+    if jit_filter is None:
+        return False
+    _filter_rows = jit_filter
+    return True
+
+
+def _as_array(models):
+    """Return models as a (len(models), 4) uint16 array of D, F, C, N masks."""
+    return np.array(models, dtype=np.uint16).reshape(-1, 4)
+
+
+def encode_percepts(percepts):
+    """Translate a percepts dict into (c_req, c_forbid, n_req, n_forbid) masks:
+    cells where C (resp. N) must be true and cells where it must be false.
+    """
+    c_req = c_forbid = n_req = n_forbid = 0
+    for (sym, cell), val in percepts.items():
+        if cell not in IDX:
+            raise ValueError('Unknown percept cell')
+        bit = 1 << IDX[cell]
+        if sym == 'C':
+            if val:
+                c_req |= bit
+            else:
+                c_forbid |= bit
+        elif sym == 'N':
+            if val:
+                n_req |= bit
+            else:
+                n_forbid |= bit
+        else:
+            raise ValueError('Unknown percept symbol')
+    return c_req, c_forbid, n_req, n_forbid
 
 
 def enumerate_models(percepts=None):
@@ -48,88 +216,140 @@ def enumerate_models(percepts=None):
     that satisfy initial axioms and the given percepts.
 
     percepts: dict mapping tuples like ('C', (x,y)) to bool, or ('N', (x,y)) to bool.
-    Returns list of models; model is dict with keys 'D', 'F', 'C', 'N'.
+    Returns tuple of models; each model is a Model of masks (D, F, C, N).
+    Results are cached per distinct percept masks and shared between callers.
     """
     if percepts is None:
         percepts = {}
+    return _enumerate_cached(*encode_percepts(percepts))
 
-    models = []
 
-    for Dcell in coords:  # exactly one damaged floor
-        Dset = {Dcell}
-        for Fcell in coords:  # exactly one forklift
-            Fset = {Fcell}
+@lru_cache(maxsize=None)
+def _enumerate_cached(c_req, c_forbid, n_req, n_forbid):
+    rows = _filter_rows(c_req, c_forbid, n_req, n_forbid)
+    return tuple(MODELS_TABLE[i] for i in rows)
 
-            # Initial knowledge: start square (1,1) is safe => not D and not F
-            if (1, 1) in Dset or (1, 1) in Fset:
-                continue
 
-            Cset = derive_creaks(Dset)
-            Nset = derive_noises(Fset)
+def _fold_columns_numpy(D, F):
+    """Reduce D and F mask arrays in a single pass to the masks
+    (provable_safe, provable_damaged, provable_forklift, possible_D, possible_F).
+    """
+    if not D.size:
+        return 0, 0, 0, 0, 0
+    or_D = int(np.bitwise_or.reduce(D))
+    or_F = int(np.bitwise_or.reduce(F))
+    and_D = int(np.bitwise_and.reduce(D))
+    and_F = int(np.bitwise_and.reduce(F))
+    return ~(or_D | or_F) & ALL_MASK, and_D, and_F, or_D, or_F
 
-            # Check percept consistency
-            violated = False
-            for (sym, cell), val in percepts.items():
-                if sym == 'C':
-                    if ((cell in Cset) != val):
-                        violated = True
-                        break
-                elif sym == 'N':
-                    if ((cell in Nset) != val):
-                        violated = True
-                        break
-                else:
-                    raise ValueError('Unknown percept symbol')
-            if violated:
-                continue
 
-            model = {'D': set(Dset), 'F': set(Fset), 'C': set(Cset), 'N': set(Nset)}
-            models.append(model)
+if _cy is not None:
+    def _fold_columns(D, F):
+        return _cy.fold_columns(D, F, ALL_MASK)
+else:
+    _fold_columns = _fold_columns_numpy
 
-    return models
+
+def _fold_models(models):
+    arr = _as_array(models)
+    return _fold_columns(arr[:, 0], arr[:, 1])
 
 
 def provable_facts(models):
     """Given a list of models, compute provable facts across all models.
-    Returns dicts: provable_safe, provable_damaged, provable_forklift.
-    Each is a set of cells that are True in all models for that predicate.
+    Returns masks: provable_safe, provable_damaged, provable_forklift.
+    Each has a bit set for the cells that are True in all models for that predicate.
     """
-    if not models:
-        return set(), set(), set()
+    return _fold_models(models)[:3]
+
+
+class SummaryMasks(NamedTuple):
+    """Summary of a set of models: its size and the summary cell sets as masks."""
+    num_models: int
+    provably_safe: int
+    provably_damaged: int
+    provably_forklift: int
+    possible_D: int
+    possible_F: int
+
 
-    prov_safe = set(coords)
-    prov_damaged = set(coords)
-    prov_forklift = set(coords)
+def summary_masks(models):
+    """Return the summary of models as a SummaryMasks of plain ints."""
+    return SummaryMasks(len(models), *_fold_models(models))
 
-    for cell in coords:
-        for m in models:
-            if not is_safe(cell, m['D'], m['F']):
-                prov_safe.discard(cell)
-            if cell not in m['D']:
-                prov_damaged.discard(cell)
-            if cell not in m['F']:
-                prov_forklift.discard(cell)
 
-    return prov_safe, prov_damaged, prov_forklift
+def summary_from_masks(num_models, prov_safe, prov_damaged, prov_forklift, poss_D, poss_F):
+    """Turn summary masks (see summary_masks) into the summary dict of cell sets."""
+    return {
+        'num_models': num_models,
+        'provably_safe': mask_to_cells(prov_safe),
+        'provably_damaged': mask_to_cells(prov_damaged),
+        'provably_forklift': mask_to_cells(prov_forklift),
+        'possible_D': mask_to_cells(poss_D),
+        'possible_F': mask_to_cells(poss_F),
+    }
 
 
 def summarize(models):
     """Return summary strings and sets of possible locations for D and F."""
-    prov_safe, prov_damaged, prov_forklift = provable_facts(models)
-
-    # Possible sets (appear in at least one model)
-    poss_D = set()
-    poss_F = set()
-    for m in models:
-        poss_D.update(m['D'])
-        poss_F.update(m['F'])
-
-    summary = {
-        'num_models': len(models),
-        'provably_safe': prov_safe,
-        'provably_damaged': prov_damaged,
-        'provably_forklift': prov_forklift,
-        'possible_D': poss_D,
-        'possible_F': poss_F,
-    }
-    return summary
+    return summary_from_masks(*summary_masks(models))
+
+
+def _summary_masks_for(c_req, c_forbid, n_req, n_forbid):
+    # Reduce the matching table rows directly; no model tuples are built
+    rows = _filter_rows(c_req, c_forbid, n_req, n_forbid)
+    return SummaryMasks(len(rows), *_fold_columns(D_ARR[rows], F_ARR[rows]))
+
+
+def percept_summary_masks(percepts=None):
+    """Return the same masks as summary_masks(enumerate_models(percepts))
+    without materializing the list of models.
+    """
+    if percepts is None:
+        percepts = {}
+    return _summary_masks_for(*encode_percepts(percepts))
+
+
+def summarize_percepts(percepts=None):
+    """Return the same summary as summarize(enumerate_models(percepts))
+    without materializing the list of models.
+    """
+    return summary_from_masks(*percept_summary_masks(percepts))
+
+
+def solve_scenarios(percepts_list, processes=None):
+    """Summarize each percepts dict in percepts_list, returning summaries in order.
+    Scenarios are independent, so large sweeps are spread over a pool of worker
+    processes (at most one per scenario); a single scenario or processes=1 runs
+    in-process.
+    """
+    percepts_list = list(percepts_list)
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = min(processes, len(percepts_list))
+    if processes <= 1:
+        return [summarize_percepts(p) for p in percepts_list]
+    with Pool(processes) as pool:
+        return pool.map(summarize_percepts, percepts_list)
+
+
+def load_compiled_kb(path):
+    """Load a percept->summary table written by scripts/compile_kb.py.
+    The compiled table for this model is shipped as scripts/output/warehouse_kb.pkl
+    for batch callers that look up many trajectories; rerun compile_kb.py after
+    changing the model table.
+    """
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def summarize_from_percepts(percepts, kb):
+    """Return the same summary as summarize(enumerate_models(percepts)),
+    looked up in a compiled kb (see load_compiled_kb) keyed by encode_percepts.
+    Percept sets the kb does not cover are enumerated as usual.
+    """
+    key = encode_percepts(percepts)
+    masks = kb.get(key)
+    if masks is None:
+        masks = _summary_masks_for(*key)
+    return summary_from_masks(*masks)
@@ -0,0 +1,35 @@
+# cython: language_level=3
+"""Compiled kernels for warehouse_logic (build with `python scripts/build_cython.py`).
+warehouse_logic uses them when the extension is built and falls back to
+Numba/NumPy otherwise.
+"""
+import numpy as np
+
+
+def filter_rows(const unsigned int[:] CN, unsigned int req, unsigned int forbid):
+    """Return the indices whose packed CN word satisfies req/forbid."""
+    cdef Py_ssize_t[:] out = np.empty(CN.shape[0], dtype=np.intp)
+    cdef Py_ssize_t i, k = 0
+    cdef unsigned int cn
+    with nogil:
+        for i in range(CN.shape[0]):
+            cn = CN[i]
+            if (cn & req) == req and (cn & forbid) == 0:
+                out[k] = i
+                k += 1
+    return np.asarray(out[:k])
+
+
+def fold_columns(const unsigned short[:] D, const unsigned short[:] F, unsigned int all_mask):
+    """Single-pass reduction of D/F mask columns; see warehouse_logic._fold_columns."""
+    cdef Py_ssize_t i
+    cdef unsigned int or_D = 0, or_F = 0, and_D = all_mask, and_F = all_mask
+    if D.shape[0] == 0:
+        return 0, 0, 0, 0, 0
+    with nogil:
+        for i in range(D.shape[0]):
+            or_D |= D[i]
+            or_F |= F[i]
+            and_D &= D[i]
+            and_F &= F[i]
+    return ~(or_D | or_F) & all_mask, and_D, and_F, or_D, or_F
@@ -0,0 +1,22 @@
+"""Tests for the per-cell display status and ASCII grid of the warehouse runner."""
+import pytest
+
+from scripts.run_warehouse import ascii_grid_label, cell_status
+from src.warehouse_logic import percept_summary_masks
+
+SCENARIO_1 = {('C', (1, 1)): False, ('N', (1, 1)): False}
+SCENARIO_2 = {('C', (1, 1)): False, ('N', (1, 1)): False, ('C', (2, 1)): True, ('N', (2, 1)): False}
+
+
+@pytest.mark.parametrize('percepts, expected', [
+    (SCENARIO_1, 'P:D+F | P:D+F | P:D+F\n'
+                 'SAFE  | P:D+F | P:D+F\n'
+                 'SAFE  | SAFE  | P:D+F'),
+    (SCENARIO_2, 'P:F   | P:F   | P:F  \n'
+                 'SAFE  | P:D   | P:F  \n'
+                 'SAFE  | SAFE  | P:D  '),
+])
+def test_ascii_grid_matches_baseline(percepts, expected):
+    masks = percept_summary_masks(percepts)
+    status = cell_status(masks.provably_safe, masks.possible_D, masks.possible_F)
+    assert ascii_grid_label(status) == expected
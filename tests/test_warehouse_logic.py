@@ -0,0 +1,150 @@
+"""Tests for the 3x3 warehouse propositional enumerator."""
+import os
+import random
+from itertools import product
+
+import pytest
+
+from src import warehouse_logic as wl
+from src.warehouse_logic import (coords, derive_creaks, encode_percepts, enumerate_models,
+                                 load_compiled_kb, solve_scenarios, summarize,
+                                 summarize_from_percepts, summarize_percepts)
+
+KB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                       'scripts', 'output', 'warehouse_kb.pkl')
+
+
+def all_assignments(sym):
+    """Yield every percepts dict over sym: each cell unobserved, True or False."""
+    for values in product((None, True, False), repeat=len(coords)):
+        yield {(sym, cell): val for cell, val in zip(coords, values) if val is not None}
+
+
+def random_percepts(n, seed=0):
+    rng = random.Random(seed)
+    for _ in range(n):
+        yield {(rng.choice('CN'), rng.choice(coords)): rng.random() < 0.5
+               for _ in range(rng.randint(0, 8))}
+
+
+def adjacent(a, b):
+    return abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1
+
+
+def reference_summary(percepts):
+    """Brute-force enumeration over (D, F) cell pairs using plain sets."""
+    models = []
+    for d, f in product(coords, coords):
+        if (1, 1) in (d, f):
+            continue
+        creaks = {c for c in coords if adjacent(c, d)}
+        noises = {c for c in coords if adjacent(c, f)}
+        if all((cell in (creaks if sym == 'C' else noises)) == val
+               for (sym, cell), val in percepts.items()):
+            models.append((d, f))
+    if not models:
+        return {'num_models': 0, 'provably_safe': set(), 'provably_damaged': set(),
+                'provably_forklift': set(), 'possible_D': set(), 'possible_F': set()}
+    possible_D = {d for d, _ in models}
+    possible_F = {f for _, f in models}
+    return {
+        'num_models': len(models),
+        'provably_safe': set(coords) - possible_D - possible_F,
+        'provably_damaged': possible_D if len(possible_D) == 1 else set(),
+        'provably_forklift': possible_F if len(possible_F) == 1 else set(),
+        'possible_D': possible_D,
+        'possible_F': possible_F,
+    }
+
+
+def test_scenarios():
+    s1 = summarize(enumerate_models({('C', (1, 1)): False, ('N', (1, 1)): False}))
+    assert s1['num_models'] == 36
+    assert s1['provably_safe'] == {(1, 1), (1, 2), (2, 1)}
+
+    s2 = summarize(enumerate_models({('C', (1, 1)): False, ('N', (1, 1)): False,
+                                     ('C', (2, 1)): True, ('N', (2, 1)): False}))
+    assert s2['num_models'] == 8
+    assert s2['possible_D'] == {(2, 2), (3, 1)}
+    assert s2['possible_F'] == {(1, 3), (2, 3), (3, 2), (3, 3)}
+
+
+def test_summaries_match_brute_force():
+    for percepts in random_percepts(1000):
+        expected = reference_summary(percepts)
+        assert summarize(enumerate_models(percepts)) == expected
+        assert summarize_percepts(percepts) == expected
+
+
+def test_unknown_percept_symbol():
+    with pytest.raises(ValueError):
+        enumerate_models({('X', (1, 1)): True})
+    with pytest.raises(ValueError):
+        enumerate_models({('C', (9, 9)): False})
+
+
+@pytest.mark.parametrize('mask', [-1, wl.ALL_MASK + 1])
+def test_derive_rejects_out_of_range_masks(mask):
+    with pytest.raises(ValueError):
+        derive_creaks(mask)
+
+
+def test_solve_scenarios_matches_serial():
+    percepts_list = list(random_percepts(20, seed=3))
+    expected = [summarize_percepts(p) for p in percepts_list]
+    assert solve_scenarios(percepts_list, processes=2) == expected
+    assert solve_scenarios(percepts_list, processes=1) == expected
+    assert solve_scenarios([]) == []
+
+
+def test_compiled_kb_is_current():
+    """A stale pickle must fail here rather than be trusted by summarize_from_percepts."""
+    from scripts.compile_kb import compile_kb, decode_key
+
+    kb = load_compiled_kb(KB_PATH)
+    assert kb == compile_kb()
+    for key in kb:
+        percepts = decode_key(key)
+        assert summarize_from_percepts(percepts, kb) == summarize_percepts(percepts)
+
+
+def percept_keys():
+    keys = {encode_percepts(p) for p in all_assignments('C')}
+    keys |= {encode_percepts(p) for p in random_percepts(2000, seed=1)}
+    return sorted(keys)
+
+
+def test_cython_kernels_match_numpy():
+    if wl._cy is None:
+        pytest.skip('Cython kernels not built')
+    for key in percept_keys():
+        rows = wl._filter_rows_numpy(*key)
+        cy_rows = wl._cy.filter_rows(wl.CN_ARR, *wl._pack_percepts(*key))
+        assert list(cy_rows) == list(rows)
+        D, F = wl.D_ARR[rows], wl.F_ARR[rows]
+        assert wl._cy.fold_columns(D, F, wl.ALL_MASK) == wl._fold_columns_numpy(D, F)
+
+
+def test_jit_filter_matches_numpy():
+    jit_filter = wl._make_jit_filter()
+    if jit_filter is None:
+        pytest.skip('numba not installed')
+    for key in percept_keys():
+        assert list(jit_filter(*key)) == list(wl._filter_rows_numpy(*key))
+
+
+def test_enable_jit_routes_filtering(monkeypatch):
+    pytest.importorskip('numba')
+    monkeypatch.setattr(wl, '_filter_rows', wl._filter_rows)
+    wl._enumerate_cached.cache_clear()
+    try:
+        enabled = wl.enable_jit()
+        assert enabled == (wl._cy is None)
+        if enabled:
+            assert wl._filter_rows.__name__ == '_filter_rows_jit'
+        for percepts in random_percepts(200, seed=2):
+            expected = reference_summary(percepts)
+            assert summarize(enumerate_models(percepts)) == expected
+            assert summarize_percepts(percepts) == expected
+    finally:
+        wl._enumerate_cached.cache_clear()